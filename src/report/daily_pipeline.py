@@ -6,7 +6,8 @@ import os
 import time
 
 from dotenv import load_dotenv
-from query import fetch_data
+from query import fetch_data, parse_date
+from sketches import sketch_path
 
 load_dotenv()
 
@@ -44,11 +45,11 @@ def get_project_root():
     return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
-def push_to_github(file_path):
-    """Push a file to GitHub. file_path should be relative to repo root."""
+def push_to_github(file_path, *extra_paths):
+    """Push a file (plus any extra files) to GitHub. Paths should be relative to repo root."""
     project_root = get_project_root()
     try:
-        subprocess.run(["git", "add", "-f", file_path], cwd=project_root, check=True)
+        subprocess.run(["git", "add", "-f", file_path, *extra_paths], cwd=project_root, check=True)
         subprocess.run(["git", "commit", "-m", f"Daily dataset {file_path}"], cwd=project_root, check=True)
         subprocess.run(["git", "push"], cwd=project_root, check=True)
     except subprocess.CalledProcessError:
@@ -153,12 +154,14 @@ def main():
         print(f"No DATE specified, using yesterday: {date_to_fetch}")
     else:
         print(f"Using DATE from environment: {date_to_fetch}")
+    # Normalise once (e.g. 2026-5-3 -> 2026-05-03) so the sketch path pushed below matches the file fetch_data writes
+    _, date_to_fetch = parse_date(date_to_fetch)
 
     print("Fetching data...")
     csv_file = fetch_data(date_to_fetch)
 
     print("Pushing to GitHub...")
-    push_to_github(csv_file)
+    push_to_github(csv_file, sketch_path(date_to_fetch))
 
     file_url = GITHUB_RAW_BASE + csv_file
     
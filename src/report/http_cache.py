@@ -0,0 +1,187 @@
+"""
+Local HTTP response cache with conditional revalidation.
+
+Responses are keyed by URL, query parameters and credentials. Bodies are stored gzip-compressed
+on disk next to an index of ETag/Last-Modified validators; repeated requests are
+revalidated with If-None-Match/If-Modified-Since so unchanged resources come back
+as cheap 304s. The cache is bounded in size and evicts least recently used entries.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import zlib
+
+from dotenv import load_dotenv
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+load_dotenv()
+
+# Relative paths are resolved against the project root, not the working directory
+HTTP_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    os.getenv("HTTP_CACHE_DIR", ".http_cache"),
+)
+HTTP_CACHE_MAX_MB = int(os.getenv("HTTP_CACHE_MAX_MB", "200"))
+
+INDEX_FILE = "index.json"
+# Response headers worth replaying from the cache
+STORED_HEADERS = ["Content-Type", "ETag", "Last-Modified", "Cache-Control"]
+# Request headers that change what the server returns (the API key selects whose reports are listed)
+KEY_HEADERS = ["X-API-Key", "X-App-Token"]
+
+
+def cache_key(url, params=None, headers=None):
+    """Stable key for a GET request: the URL, its sorted query parameters and its credentials."""
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+    lowered = {str(k).lower(): str(v) for k, v in (headers or {}).items()}
+    credentials = [lowered.get(h.lower(), "") for h in KEY_HEADERS]
+    return hashlib.sha256(json.dumps([url, items, credentials]).encode("utf-8")).hexdigest()
+
+
+def _max_age(cache_control):
+    """Seconds a response may be reused without revalidation (0 if it must be revalidated)."""
+    if not cache_control or "no-cache" in cache_control:
+        return 0
+    match = re.search(r"max-age=(\d+)", cache_control)
+    return int(match.group(1)) if match else 0
+
+
+class HTTPCache:
+    """Size-bounded on-disk cache for GET responses."""
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, max_bytes=HTTP_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable HTTP cache index: {e}")
+            return {}
+
+    def _save_index(self):
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, path)
+
+    def _body_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.gz")
+
+    def _read_body(self, key):
+        """Cached body, or None if it is missing or damaged (e.g. a run killed mid-write)."""
+        try:
+            with open(self._body_path(key), "rb") as f:
+                return gzip.decompress(f.read())
+        except (OSError, EOFError, zlib.error):
+            return None
+
+    def _remove(self, key):
+        self.index.pop(key, None)
+        try:
+            os.remove(self._body_path(key))
+        except OSError:
+            pass
+
+    def _store(self, key, resp):
+        cache_control = resp.headers.get("Cache-Control", "")
+        if "no-store" in cache_control:
+            return
+        if not (resp.headers.get("ETag") or resp.headers.get("Last-Modified") or _max_age(cache_control)):
+            return
+        compressed = gzip.compress(resp.content, mtime=0)
+        body_path = self._body_path(key)
+        with open(body_path + ".tmp", "wb") as f:
+            f.write(compressed)
+        os.replace(body_path + ".tmp", body_path)
+        self.index[key] = {
+            "url": resp.url,
+            "headers": {h: resp.headers[h] for h in STORED_HEADERS if h in resp.headers},
+            "encoding": resp.encoding,
+            "size": len(compressed),
+            "expires": time.time() + _max_age(cache_control),
+            "last_used": time.time(),
+        }
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        total = sum(entry["size"] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key]["size"]
+            self._remove(key)
+
+    def _replay(self, key, body):
+        entry = self.index[key]
+        entry["last_used"] = time.time()
+        resp = Response()
+        resp.status_code = 200
+        resp.url = entry["url"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.encoding = entry["encoding"]
+        resp._content = body
+        return resp
+
+    def get(self, session, url, params=None, headers=None, **kwargs):
+        """Issue a GET through session (a requests.Session or the requests module), answering from the cache whenever possible."""
+        key = cache_key(url, params, headers)
+        entry = self.index.get(key)
+        body = self._read_body(key) if entry else None
+        if entry and body is None:
+            self._remove(key)
+            entry = None
+
+        if entry and entry["expires"] > time.time():
+            self.hits += 1
+            replayed = self._replay(key, body)
+            self._save_index()
+            return replayed
+
+        request_headers = dict(headers or {})
+        if entry:
+            if "ETag" in entry["headers"]:
+                request_headers["If-None-Match"] = entry["headers"]["ETag"]
+            if "Last-Modified" in entry["headers"]:
+                request_headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        resp = session.get(url, params=params, headers=request_headers, **kwargs)
+        if resp.status_code == 304 and entry:
+            self.revalidated += 1
+            # A 304 may refresh the validators and freshness lifetime
+            for h in STORED_HEADERS:
+                if h in resp.headers:
+                    entry["headers"][h] = resp.headers[h]
+            entry["expires"] = time.time() + _max_age(entry["headers"].get("Cache-Control", ""))
+            replayed = self._replay(key, body)
+            self._save_index()
+            return replayed
+
+        self.misses += 1
+        if resp.status_code == 200:
+            self._store(key, resp)
+            self._save_index()
+        return resp
+
+    def summary(self):
+        size_mb = sum(entry["size"] for entry in self.index.values()) / (1024 * 1024)
+        return (
+            f"HTTP cache: {self.hits} hits, {self.revalidated} revalidated (304), "
+            f"{self.misses} misses, {len(self.index)} entries ({size_mb:.1f} MB)"
+        )
@@ -1,14 +1,20 @@
 import csv
+import gzip
+import json
 import os
+import re
 import sys
 import time
-from datetime import datetime
+from datetime import date as date_cls, datetime, timedelta
 
 from dotenv import load_dotenv
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from http_cache import HTTPCache
+from sketches import write_daily_sketch
+
 load_dotenv()
 
 APP_TOKEN = os.getenv("APP_TOKEN", "")
@@ -55,6 +61,61 @@ for pair in _rename.split(","):
         RENAME_COLUMNS[old.strip()] = new.strip()
 
 
+# Raw copies are gitignored: they live locally and, in CI, in the actions cache
+RAW_DIR = os.path.join("datasets", "raw")
+RAW_FILE_TEMPLATE = "pagamenti_{date}.jsonl.gz"
+RAW_RETENTION_DAYS = int(os.getenv("RAW_RETENTION_DAYS", "30"))
+
+
+def get_project_root():
+    """Get the project root directory."""
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def project_record(r, date_short):
+    """Apply the pag_data hour enrichment, DROP_COLUMNS and RENAME_COLUMNS to a raw record in place."""
+    ora = r.get("ora", "0")
+    r["pag_data"] = f"{date_short}T{int(ora):02d}:00:00.000"
+    for col in DROP_COLUMNS:
+        r.pop(col, None)
+    for old, new in RENAME_COLUMNS.items():
+        if old in r:
+            r[new] = r.pop(old)
+    return r
+
+
+def raw_file_relative(date_short):
+    """Relative path (from the repo root) of the untouched raw copy of a fetch."""
+    return os.path.join(RAW_DIR, RAW_FILE_TEMPLATE.replace("{date}", date_short))
+
+
+def list_raw_dates():
+    """Dates that have a raw copy, oldest first."""
+    raw_path = os.path.join(get_project_root(), RAW_DIR)
+    if not os.path.exists(raw_path):
+        return []
+    pattern = re.escape(RAW_FILE_TEMPLATE).replace(re.escape("{date}"), r"(\d{4}-\d{2}-\d{2})")
+    matches = (re.match(f"^{pattern}$", f) for f in os.listdir(raw_path))
+    return sorted(m.group(1) for m in matches if m)
+
+
+def prune_raw_copies(today=None):
+    """Delete raw copies older than RAW_RETENTION_DAYS."""
+    cutoff = ((today or date_cls.today()) - timedelta(days=RAW_RETENTION_DAYS)).isoformat()
+    for date_short in list_raw_dates():
+        if date_short < cutoff:
+            os.remove(os.path.join(get_project_root(), raw_file_relative(date_short)))
+            print(f"Removed raw copy for {date_short} (older than {RAW_RETENTION_DAYS} days)")
+
+
+def write_raw_copy(records, raw_file):
+    """Write the records exactly as returned by Socrata, one JSON object per line."""
+    os.makedirs(os.path.dirname(raw_file), exist_ok=True)
+    with gzip.open(raw_file, "wt", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+
 def fetch_all_records(date_ts):
     headers = {}
     if APP_TOKEN:
@@ -66,6 +127,7 @@ def fetch_all_records(date_ts):
     }
 
     session = _build_session()
+    cache = HTTPCache()
     all_records = []
     offset = 0
 
@@ -73,7 +135,7 @@ def fetch_all_records(date_ts):
         params = {**params_base, "$offset": offset}
         for attempt in range(1, MAX_RETRIES + 1):
             try:
-                resp = session.get(ENDPOINT, headers=headers, params=params, timeout=60)
+                resp = cache.get(session, ENDPOINT, headers=headers, params=params, timeout=60)
                 resp.raise_for_status()
                 break
             except requests.exceptions.ConnectionError as e:
@@ -91,6 +153,7 @@ def fetch_all_records(date_ts):
             break
         offset += LIMIT
 
+    print(cache.summary())
     return all_records
 
 
@@ -107,7 +170,7 @@ def fetch_data(date:str|None=None):
     output_template = os.getenv("OUTPUT_FILE", "pagamenti_{date}.csv")
     output_filename = output_template.replace("{date}", date_short)
     
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    project_root = get_project_root()
     datasets_dir = os.path.join(project_root, "datasets")
     os.makedirs(datasets_dir, exist_ok=True)
     output_file = os.path.join(datasets_dir, output_filename)
@@ -115,18 +178,17 @@ def fetch_data(date:str|None=None):
     output_file_relative = os.path.join("datasets", output_filename)
 
     records = fetch_all_records(date_ts)
+    raw_file = os.path.join(project_root, raw_file_relative(date_short))
+    write_raw_copy(records, raw_file)
+    print(f"Saved raw copy of {len(records)} records to {raw_file}")
+    prune_raw_copies()
     for r in records:
-        ora = r.get("ora", "0")
-        r["pag_data"] = f"{date_short}T{int(ora):02d}:00:00.000"
-        for col in DROP_COLUMNS:
-            r.pop(col, None)
-        for old, new in RENAME_COLUMNS.items():
-            if old in r:
-                r[new] = r.pop(old)
+        project_record(r, date_short)
     fieldnames = list(records[0].keys()) if records else []
     with open(output_file, "w", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(records)
     print(f"Saved {len(records)} records to {output_file}")
+    write_daily_sketch(records, date_short)
     return output_file_relative
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Offline re-projection of the dataset exports from their raw copies.
+
+fetch_data keeps an untouched copy of every Socrata fetch in
+datasets/raw/pagamenti_{date}.jsonl.gz (gitignored, pruned after RAW_RETENTION_DAYS). When DROP_COLUMNS, RENAME_COLUMNS or the
+pag_data enrichment change, this script rewrites the derived CSVs (and their
+daily sketches) from those copies instead of downloading them again. Files are
+processed in parallel by a process pool; each one is streamed in chunks so
+memory stays bounded regardless of file size.
+
+Usage:
+    python reproject.py                          # every raw copy
+    python reproject.py 2026-05-03 2026-05-04    # selected dates
+    python reproject.py --workers 4 --chunk-size 5000
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+from query import RAW_DIR, list_raw_dates, parse_date, project_record, raw_file_relative
+from sketches import PaymentSketch, get_project_root, save_sketch
+
+CHUNK_SIZE = 10000
+
+def output_file_for(date_short):
+    """Absolute path of the derived CSV, following OUTPUT_FILE like fetch_data does."""
+    output_template = os.getenv("OUTPUT_FILE", "pagamenti_{date}.csv")
+    return os.path.join(get_project_root(), "datasets", output_template.replace("{date}", date_short))
+
+
+def reproject_file(date_short, chunk_size=CHUNK_SIZE):
+    """Rewrite one day's CSV and sketch from its raw copy. Returns the number of rows."""
+    raw_file = os.path.join(get_project_root(), raw_file_relative(date_short))
+    output_file = output_file_for(date_short)
+    tmp_file = output_file + ".tmp"
+    sketch = PaymentSketch(seed=date_short)
+    rows = 0
+
+    try:
+        with gzip.open(raw_file, "rt", encoding="utf-8") as src, open(tmp_file, "w", newline="") as dst:
+            writer = None
+            while True:
+                chunk = [project_record(json.loads(line), date_short) for line in islice(src, chunk_size)]
+                if not chunk:
+                    break
+                if writer is None:
+                    writer = csv.DictWriter(dst, fieldnames=list(chunk[0].keys()))
+                    writer.writeheader()
+                writer.writerows(chunk)
+                for record in chunk:
+                    sketch.update(record)
+                rows += len(chunk)
+            if writer is None:
+                # Same output as fetch_data for a day without records: a bare newline
+                csv.DictWriter(dst, fieldnames=[]).writeheader()
+        os.replace(tmp_file, output_file)
+    finally:
+        # Only left behind when the file failed partway through
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    save_sketch(sketch, date_short)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite dataset CSVs from their raw Socrata copies.")
+    parser.add_argument("dates", nargs="*", help="YYYY-MM-DD dates to re-project (default: all raw copies)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="records held in memory per file")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    # parse_date exits with a usage message on a malformed date and normalises e.g. 2026-5-3;
+    # duplicates would have several workers writing the same files
+    dates = sorted({parse_date(d)[1] for d in args.dates}) or list_raw_dates()
+    if not dates:
+        print(f"No raw copies found in {RAW_DIR}")
+        return
+
+    print(f"Re-projecting {len(dates)} files with {args.workers} workers...")
+    start_time = time.perf_counter()
+    total_rows = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(reproject_file, d, args.chunk_size): d for d in dates}
+        for future in as_completed(futures):
+            date_short = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                print(f"✗ {date_short}: {e}")
+                failed.append(date_short)
+                continue
+            total_rows += rows
+            print(f"✓ {date_short}: {rows} rows")
+    elapsed = time.perf_counter() - start_time
+
+    done = len(dates) - len(failed)
+    print(
+        f"\nRe-projected {done} files ({total_rows} rows) in {elapsed:.2f}s: "
+        f"{done / elapsed:.1f} files/s, {total_rows / elapsed:.0f} rows/s"
+    )
+    if failed:
+        print(f"Failed: {', '.join(sorted(failed))}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+Bounded-memory streaming statistics over the payment stream.
+
+Each daily export is summarised into a small set of mergeable sketches
+(KLL quantiles, Space-Saving heavy hitters, HyperLogLog cardinality) that is
+serialized to sketches/pagamenti_{date}.json. Any date range can then be
+answered by merging the daily files one at a time, without re-reading the CSVs.
+
+Usage:
+    python sketches.py 2026-05-01 2026-05-31   # summary for a date range
+    python sketches.py --backfill              # build sketches for existing dataset exports
+"""
+import base64
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import zlib
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SKETCH_VERSION = 1
+
+KLL_K = 200
+TOP_K = 50
+HLL_PRECISION = 12
+
+# Column names as they appear in the exported CSV (i.e. after RENAME_COLUMNS)
+AMOUNT_COLUMN = os.getenv("SKETCH_AMOUNT_COLUMN", "pag_importo")
+GROUP_COLUMN = os.getenv("SKETCH_GROUP_COLUMN", "tipo_dovuto")
+PSP_COLUMN = os.getenv("SKETCH_PSP_COLUMN", "psp_desc")
+ENTE_COLUMN = os.getenv("SKETCH_ENTE_COLUMN", "ente_desc")
+# The open dataset carries no payer identifier: distinct counts default to the payment id
+DISTINCT_COLUMN = os.getenv("SKETCH_DISTINCT_COLUMN", "id")
+
+
+def get_project_root():
+    """Get the project root directory."""
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _hash64(value):
+    """Stable 64-bit hash of a string (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class KLLSketch:
+    """KLL quantile sketch (Karnin, Lang, Liberty 2016) over floats.
+
+    Compaction coin flips come from a generator seeded with `seed`, so the same
+    input always produces the same sketch (and the same serialized file).
+    """
+
+    def __init__(self, k=KLL_K, seed=""):
+        self.k = k
+        self.n = 0
+        self.seed = seed
+        self.compactors = [[]]
+        self._random = random.Random(seed)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _size(self):
+        return sum(len(c) for c in self.compactors)
+
+    def _max_size(self):
+        return sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compress(self):
+        while self._size() >= self._max_size():
+            for h, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(h):
+                    if h + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    items.sort()
+                    offset = self._random.getrandbits(1)
+                    self.compactors[h + 1].extend(items[offset::2])
+                    self.compactors[h] = []
+                    break
+
+    def update(self, value):
+        self.compactors[0].append(value)
+        self.n += 1
+        if self._size() >= self._max_size():
+            self._compress()
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for h, items in enumerate(other.compactors):
+            self.compactors[h].extend(items)
+        self.n += other.n
+        self._compress()
+
+    def quantiles(self, fractions):
+        """Return the approximate value at each fraction in [0, 1]."""
+        weighted = sorted(
+            (value, 2 ** h) for h, items in enumerate(self.compactors) for value in items
+        )
+        if not weighted:
+            return [None for _ in fractions]
+        total = sum(w for _, w in weighted)
+        results = []
+        for q in fractions:
+            target = q * total
+            cumulative = 0
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    break
+            results.append(value)
+        return results
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "seed": self.seed, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["k"], data.get("seed", ""))
+        sketch.n = data["n"]
+        sketch.compactors = [list(c) for c in data["compactors"]]
+        return sketch
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters (Metwally et al. 2005) with mergeable counters."""
+
+    def __init__(self, capacity=TOP_K):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def _floor(self):
+        """Upper bound on the count of any key not currently tracked."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def update(self, key, weight=1):
+        if key in self.counts:
+            self.counts[key] += weight
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[key] = weight
+            self.errors[key] = 0
+            return
+        victim = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(victim)
+        self.errors.pop(victim)
+        self.counts[key] = floor + weight
+        self.errors[key] = floor
+
+    def merge(self, other):
+        self_floor, other_floor = self._floor(), other._floor()
+        counts, errors = {}, {}
+        # Sorted iteration and a key tie-break keep the result independent of set ordering
+        for key in sorted(set(self.counts) | set(other.counts)):
+            counts[key] = self.counts.get(key, self_floor) + other.counts.get(key, other_floor)
+            errors[key] = (
+                self.errors.get(key, self_floor) + other.errors.get(key, other_floor)
+            )
+        top = sorted(counts, key=lambda k: (-counts[k], k))[:self.capacity]
+        self.counts = {key: counts[key] for key in top}
+        self.errors = {key: errors[key] for key in top}
+
+    def top(self, n=10):
+        """Return [(key, count, max_overestimate), ...] sorted by count."""
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+        return [(key, count, self.errors[key]) for key, count in ranked]
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "counts": self.counts, "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["capacity"])
+        sketch.counts = dict(data["counts"])
+        sketch.errors = dict(data["errors"])
+        return sketch
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter (Flajolet et al. 2007)."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def update(self, value):
+        x = _hash64(value)
+        idx = x >> (64 - self.precision)
+        rest = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        # Sparse registers are mostly zeros and compress to a few bytes
+        packed = base64.b64encode(zlib.compress(bytes(self.registers))).decode("ascii")
+        return {"p": self.precision, "registers": packed}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["p"])
+        sketch.registers = bytearray(zlib.decompress(base64.b64decode(data["registers"])))
+        return sketch
+
+
+class PaymentSketch:
+    """All payment statistics for a span of days, fed one record at a time."""
+
+    def __init__(self, seed=""):
+        self.seed = seed
+        self.records = 0
+        self.amount_by_group = {}
+        self.top_psp = SpaceSaving()
+        self.top_ente = SpaceSaving()
+        self.distinct_by_ente = {}
+
+    def update(self, record):
+        self.records += 1
+        amount = record.get(AMOUNT_COLUMN)
+        if amount not in (None, ""):
+            group = record.get(GROUP_COLUMN) or ""
+            if group not in self.amount_by_group:
+                self.amount_by_group[group] = KLLSketch(seed=f"{self.seed}:{group}")
+            self.amount_by_group[group].update(float(amount))
+        if record.get(PSP_COLUMN):
+            self.top_psp.update(record[PSP_COLUMN])
+        ente = record.get(ENTE_COLUMN)
+        if ente:
+            self.top_ente.update(ente)
+            if record.get(DISTINCT_COLUMN):
+                self.distinct_by_ente.setdefault(ente, HyperLogLog()).update(
+                    str(record[DISTINCT_COLUMN])
+                )
+
+    def merge(self, other):
+        self.records += other.records
+        for group, sketch in other.amount_by_group.items():
+            if group in self.amount_by_group:
+                self.amount_by_group[group].merge(sketch)
+            else:
+                self.amount_by_group[group] = sketch
+        self.top_psp.merge(other.top_psp)
+        self.top_ente.merge(other.top_ente)
+        for ente, sketch in other.distinct_by_ente.items():
+            if ente in self.distinct_by_ente:
+                self.distinct_by_ente[ente].merge(sketch)
+            else:
+                self.distinct_by_ente[ente] = sketch
+
+    def to_dict(self):
+        return {
+            "version": SKETCH_VERSION,
+            "seed": self.seed,
+            "records": self.records,
+            "amount_by_group": {g: s.to_dict() for g, s in self.amount_by_group.items()},
+            "top_psp": self.top_psp.to_dict(),
+            "top_ente": self.top_ente.to_dict(),
+            "distinct_by_ente": {e: s.to_dict() for e, s in self.distinct_by_ente.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != SKETCH_VERSION:
+            raise ValueError(f"Unsupported sketch version: {data.get('version')}")
+        sketch = cls(data.get("seed", ""))
+        sketch.records = data["records"]
+        sketch.amount_by_group = {
+            g: KLLSketch.from_dict(s) for g, s in data["amount_by_group"].items()
+        }
+        sketch.top_psp = SpaceSaving.from_dict(data["top_psp"])
+        sketch.top_ente = SpaceSaving.from_dict(data["top_ente"])
+        sketch.distinct_by_ente = {
+            e: HyperLogLog.from_dict(s) for e, s in data["distinct_by_ente"].items()
+        }
+        return sketch
+
+
+def sketch_path(date_short):
+    """Relative path (from the repo root) of the daily sketch file."""
+    return os.path.join("sketches", f"pagamenti_{date_short}.json")
+
+
+def write_daily_sketch(records, date_short):
+    """Summarise one day of exported records and write its sketch file."""
+    sketch = PaymentSketch(seed=date_short)
+    for record in records:
+        sketch.update(record)
+    return save_sketch(sketch, date_short)
+
+
+def save_sketch(sketch, date_short):
+    """Write an already-built daily sketch. Returns its relative path."""
+    relative_path = sketch_path(date_short)
+    output_path = os.path.join(get_project_root(), relative_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(sketch.to_dict(), f, separators=(",", ":"))
+    print(f"Saved sketch of {sketch.records} records to {output_path}")
+    return relative_path
+
+
+def load_range(start_date, end_date):
+    """Merge the daily sketches between two YYYY-MM-DD dates (inclusive)."""
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    merged = PaymentSketch()
+    days = 0
+    day = start
+    while day <= end:
+        path = os.path.join(get_project_root(), sketch_path(day.isoformat()))
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                merged.merge(PaymentSketch.from_dict(json.load(f)))
+            days += 1
+        day += timedelta(days=1)
+    print(f"Merged {days} daily sketches between {start_date} and {end_date}")
+    return merged
+
+
+def _dataset_name_re():
+    """Regex matching export filenames built from OUTPUT_FILE, capturing the date."""
+    template = os.getenv("OUTPUT_FILE", "pagamenti_{date}.csv")
+    pattern = re.escape(template).replace(re.escape("{date}"), r"(\d{4}-\d{2}-\d{2})")
+    return re.compile(f"^{pattern}$")
+
+
+def backfill_from_datasets():
+    """Build sketches for every export in datasets/ that does not have one yet."""
+    datasets_path = os.path.join(get_project_root(), "datasets")
+    if not os.path.exists(datasets_path):
+        print("No datasets folder found locally")
+        return
+    name_re = _dataset_name_re()
+    for filename in sorted(os.listdir(datasets_path)):
+        match = name_re.match(filename)
+        if not match:
+            continue
+        date_short = match.group(1)
+        if os.path.exists(os.path.join(get_project_root(), sketch_path(date_short))):
+            continue
+        with open(os.path.join(datasets_path, filename), newline="", encoding="utf-8") as f:
+            write_daily_sketch(csv.DictReader(f), date_short)
+
+
+def print_summary(sketch):
+    """Print quantiles, heavy hitters and distinct counts for a merged sketch."""
+    print(f"Records: {sketch.records}")
+    print(f"\n{AMOUNT_COLUMN} quantiles per {GROUP_COLUMN} (p50 / p90 / p99):")
+    for group, kll in sorted(sketch.amount_by_group.items(), key=lambda kv: -kv[1].n):
+        p50, p90, p99 = kll.quantiles([0.5, 0.9, 0.99])
+        print(f"  {group or '-'}: {p50:.2f} / {p90:.2f} / {p99:.2f} (n={kll.n})")
+    for label, heavy in ((PSP_COLUMN, sketch.top_psp), (ENTE_COLUMN, sketch.top_ente)):
+        print(f"\nTop {label} by payment count:")
+        for key, count, error in heavy.top():
+            print(f"  {key}: {count} (±{error})")
+    print(f"\nDistinct {DISTINCT_COLUMN} per {ENTE_COLUMN} (top 10):")
+    ranked = sorted(
+        ((ente, hll.count()) for ente, hll in sketch.distinct_by_ente.items()),
+        key=lambda kv: kv[1],
+        reverse=True,
+    )
+    for ente, count in ranked[:10]:
+        print(f"  {ente}: ~{count}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--backfill":
+        backfill_from_datasets()
+        return
+    if len(sys.argv) < 2:
+        print("Usage: python sketches.py START_DATE [END_DATE]")
+        print("   or: python sketches.py --backfill")
+        sys.exit(1)
+    start_date = sys.argv[1]
+    end_date = sys.argv[2] if len(sys.argv) > 2 else start_date
+    try:
+        print_summary(load_range(start_date, end_date))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Static asset pipeline for the generated site.
+
+Minifies HTML/CSS, writes content-hashed copies of every cacheable asset under
+assets/, a manifest.json mapping logical names to hashed files and a Cloudflare
+Pages _headers file so hashed assets are cached forever at the edge while
+index.html is always revalidated.
+
+Cloudflare Pages compresses responses itself and ignores .gz/.br sidecar files,
+so precompressed variants are only written when the pipeline is created with
+precompress=True (for hosts that serve them, e.g. nginx with gzip_static and
+brotli_static). The gzip/brotli sizes are always computed for the size report.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli variants are skipped when the package is missing
+    brotli = None
+
+ASSETS_DIR = "assets"
+MANIFEST_FILE = "manifest.json"
+HEADERS_FILE = "_headers"
+HASH_LENGTH = 10
+
+HEADERS = f"""/{ASSETS_DIR}/*
+  Cache-Control: public, max-age=31536000, immutable
+
+/
+  Cache-Control: public, max-age=0, must-revalidate
+
+/index.html
+  Cache-Control: public, max-age=0, must-revalidate
+
+/{MANIFEST_FILE}
+  Cache-Control: public, max-age=0, must-revalidate
+"""
+
+_STYLE_RE = re.compile(r"<style>(.*?)</style>", re.DOTALL)
+# Blocks copied verbatim by minify_html: whitespace-sensitive elements and the build notice
+_RAW_BLOCK_RE = re.compile(
+    r"(<(?:script|style|pre|textarea)\b.*?</(?:script|style|pre|textarea)>|<!--\s*AUTO-GENERATED.*?-->)",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def content_hash(data):
+    """Short hex digest used to fingerprint asset filenames."""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def minify_html(html):
+    """Drop comments and collapse whitespace, leaving script/style/pre blocks untouched.
+
+    The auto-generation notice is kept so the committed file still warns editors.
+    """
+    # re.split with one group alternates [text, block, text, block, ..., text]
+    parts = _RAW_BLOCK_RE.split(html)
+    for i in range(0, len(parts), 2):
+        text = re.sub(r"<!--.*?-->", "", parts[i], flags=re.DOTALL)
+        parts[i] = re.sub(r"\s+", " ", text)
+    return "".join(parts).strip()
+
+
+def extract_stylesheet(html):
+    """Split the inline <style> block out of the page. Returns (html_without_style, css)."""
+    match = _STYLE_RE.search(html)
+    if not match:
+        return html, ""
+    return html[:match.start()] + "{{STYLESHEET}}" + html[match.end():], match.group(1)
+
+
+def _write_bytes(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_variant(path, data, compressed):
+    """Write a precompressed variant only when it is actually smaller than the source."""
+    if compressed is not None and len(compressed) < len(data):
+        _write_bytes(path, compressed)
+        return len(compressed)
+    if os.path.exists(path):
+        os.remove(path)
+    return None
+
+
+def _remove_variants(path):
+    for variant in (path + ".gz", path + ".br"):
+        if os.path.exists(variant):
+            os.remove(variant)
+
+
+def write_compressed(path, data, precompress=False):
+    """Write data, plus .gz/.br variants when precompress is set. Returns the sizes."""
+    _write_bytes(path, data)
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    br = brotli.compress(data, quality=11) if brotli is not None else None
+    if not precompress:
+        _remove_variants(path)
+        return {
+            "raw": len(data),
+            "gzip": len(gz),
+            "brotli": len(br) if br is not None else None,
+        }
+    return {
+        "raw": len(data),
+        "gzip": _write_variant(path + ".gz", data, gz),
+        "brotli": _write_variant(path + ".br", data, br),
+    }
+
+
+class AssetPipeline:
+    """Collects the assets of one build and writes them into output_dir."""
+
+    def __init__(self, output_dir, precompress=False):
+        self.output_dir = output_dir
+        self.precompress = precompress
+        self.manifest = {}
+        self.report = []
+        os.makedirs(os.path.join(output_dir, ASSETS_DIR), exist_ok=True)
+
+    def add_hashed(self, name, original, minified):
+        """Write a fingerprinted asset, e.g. styles.css -> assets/styles.<hash>.css."""
+        data = minified.encode("utf-8")
+        stem, ext = os.path.splitext(name)
+        relative_path = f"{ASSETS_DIR}/{stem}.{content_hash(data)}{ext}"
+        self._add(name, relative_path, original, data)
+        return relative_path
+
+    def add_entry(self, name, original, minified):
+        """Write an entry point under its plain name (it must stay addressable)."""
+        self._add(name, name, original, minified.encode("utf-8"))
+        return name
+
+    def _add(self, name, relative_path, original, data):
+        sizes = write_compressed(os.path.join(self.output_dir, relative_path), data, self.precompress)
+        sizes["original"] = len(original.encode("utf-8"))
+        self.manifest[name] = relative_path
+        self.report.append((relative_path, sizes))
+
+    def _previous_manifest(self):
+        """Manifest of the build being replaced, if there is a readable one."""
+        path = os.path.join(self.output_dir, MANIFEST_FILE)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def finalize(self):
+        """Write manifest and headers, then remove hashed files older than the previous build.
+
+        The previous generation is kept so pages cached before this deploy can
+        still load the assets they reference.
+        """
+        previous = set(self._previous_manifest().values())
+        with open(os.path.join(self.output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+            f.write("\n")
+        with open(os.path.join(self.output_dir, HEADERS_FILE), "w", encoding="utf-8") as f:
+            f.write(HEADERS)
+
+        keep = set(self.manifest.values()) | previous
+        assets_path = os.path.join(self.output_dir, ASSETS_DIR)
+        for filename in sorted(os.listdir(assets_path)):
+            base = re.sub(r"\.(gz|br)$", "", filename)
+            is_variant = base != filename
+            if f"{ASSETS_DIR}/{base}" not in keep or (is_variant and not self.precompress):
+                os.remove(os.path.join(assets_path, filename))
+                print(f"  Removed stale asset {ASSETS_DIR}/{filename}")
+
+    def print_size_report(self):
+        """Print bytes before and after minification, and compressed transfer sizes, for each asset."""
+        print(f"{'asset':<40} {'original':>10} {'minified':>10} {'gzip':>10} {'brotli':>10}")
+        for relative_path, sizes in self.report:
+            gzip_size = sizes["gzip"] or "-"
+            brotli_size = sizes["brotli"] or "-"
+            print(
+                f"{relative_path:<40} {sizes['original']:>10} {sizes['raw']:>10} "
+                f"{gzip_size:>10} {brotli_size:>10}"
+            )
@@ -2,6 +2,7 @@
 Build script that generates a static HTML page with all report links.
 This runs during the GitHub Actions workflow after reports are created.
 """
+import json
 import os
 import sys
 import time
@@ -9,10 +10,22 @@ import requests
 from datetime import datetime
 from dotenv import load_dotenv
 
+from assets import AssetPipeline, extract_stylesheet, minify_css, minify_html
+
+# The scripts under src/ import their siblings directly (python src/<dir>/<script>.py puts
+# only <dir> on sys.path). The HTTP cache is shared with the report pipeline, so src/report
+# is added once here, the same way tests/conftest.py sets up both directories.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "report"))
+from http_cache import HTTPCache  # noqa: E402
+
 load_dotenv()
 
 API_BASE = os.getenv("API_BASE", "https://app.southwind.ai/api")
 API_KEY = os.getenv("API_KEY", "")
+# Cloudflare Pages compresses at the edge; only enable for hosts that serve .gz/.br sidecars
+PRECOMPRESS_ASSETS = os.getenv("PRECOMPRESS_ASSETS", "").lower() in ("1", "true", "yes")
+
+_http_cache = None
 
 
 def get_headers():
@@ -23,6 +36,14 @@ def get_headers():
     return headers
 
 
+def get_http_cache():
+    """Shared HTTP cache for the report listing and embed URL requests."""
+    global _http_cache
+    if _http_cache is None:
+        _http_cache = HTTPCache()
+    return _http_cache
+
+
 def wait_for_report_completion(task_id, max_wait_seconds=1800, poll_interval=30):
     """
     Poll the report status until it's completed or failed.
@@ -84,7 +105,8 @@ def wait_for_report_completion(task_id, max_wait_seconds=1800, poll_interval=30)
 def get_all_reports():
     """Fetch all reports from the API."""
     try:
-        response = requests.get(
+        response = get_http_cache().get(
+            requests,
             f"{API_BASE}/v1/reports/",
             headers=get_headers(),
             timeout=30
@@ -107,7 +129,8 @@ def get_all_reports():
 def get_report_embed_url(task_id):
     """Get the embed URL for a specific report."""
     try:
-        response = requests.get(
+        response = get_http_cache().get(
+            requests,
             f"{API_BASE}/v1/reports/{task_id}",
             headers=get_headers(),
             params={"format": "embed"},
@@ -146,26 +169,22 @@ def format_italian_date(date_string):
         return date_string
 
 
-def generate_html(reports_with_urls):
-    """Generate the HTML content with all report links."""
+def build_report_index(reports_with_urls):
+    """Build the report list that the page loads lazily, newest first."""
+    reports = sorted(reports_with_urls, key=lambda x: x['time'], reverse=True)
+    return [
+        {'date': format_italian_date(report['time']), 'url': report['embed_url']}
+        for report in reports
+        if report['embed_url']
+    ]
+
+
+def generate_html(reports_with_urls, reports_json_url):
+    """Generate the HTML content; the report list itself is fetched from reports_json_url."""
     
     # Sort reports by date (newest first)
     reports_with_urls.sort(key=lambda x: x['time'], reverse=True)
     
-    # Generate report list items
-    report_list_html = ""
-    for report in reports_with_urls:
-        if report['embed_url']:
-            formatted_date = format_italian_date(report['time'])
-            report_list_html += f"""            <li class="report-list__item">
-              <span class="report-list__date">{formatted_date}</span>
-              <a href="{report['embed_url']}" class="report-list__link" target="_blank" rel="noopener noreferrer">Leggi il report &rarr;</a>
-            </li>
-"""
-    
-    if not report_list_html:
-        report_list_html = '            <li class="report-list__item"><span class="report-list__date">Nessun report disponibile</span></li>\n'
-    
     # Get the latest report URL for the hero CTA
     latest_report_url = reports_with_urls[0]['embed_url'] if reports_with_urls and reports_with_urls[0]['embed_url'] else '#'
     
@@ -189,12 +208,41 @@ def generate_html(reports_with_urls):
     # Replace placeholders
     html = template.replace("<!DOCTYPE html>", f"<!DOCTYPE html>\n{auto_gen_comment}")
     html = html.replace("{{LATEST_REPORT_URL}}", latest_report_url)
-    html = html.replace("{{REPORT_LIST}}", report_list_html)
+    html = html.replace("{{REPORTS_JSON_URL}}", reports_json_url)
     html = html.replace("{{BUILD_TIME}}", build_time)
     
     return html
 
 
+def write_site(reports_with_urls, output_dir):
+    """Write minified, fingerprinted and precompressed site assets to output_dir."""
+    pipeline = AssetPipeline(output_dir, precompress=PRECOMPRESS_ASSETS)
+    
+    report_index = build_report_index(reports_with_urls)
+    reports_json_url = pipeline.add_hashed(
+        "reports.json",
+        json.dumps(report_index, ensure_ascii=False, indent=2),
+        json.dumps(report_index, ensure_ascii=False, separators=(",", ":")),
+    )
+    
+    html = generate_html(reports_with_urls, reports_json_url)
+    html, css = extract_stylesheet(html)
+    stylesheet_url = pipeline.add_hashed("styles.css", css, minify_css(css))
+    
+    # The stylesheet has its own row in the size report, so the "original" page
+    # size excludes it and only measures what minification saves
+    stylesheet_link = f'<link rel="stylesheet" href="{stylesheet_url}">'
+    original_html = html.replace("{{STYLESHEET}}", stylesheet_link)
+    minified_html = minify_html(html).replace("{{STYLESHEET}}", stylesheet_link)
+    pipeline.add_entry("index.html", original_html, minified_html)
+    
+    pipeline.finalize()
+    print("\nAsset sizes (bytes):")
+    pipeline.print_size_report()
+    print(f"Inline stylesheet moved out of index.html: {len(css.encode('utf-8'))} bytes")
+    return len(report_index)
+
+
 def main():
     """Main build function."""
     print("=" * 60)
@@ -233,17 +281,14 @@ def main():
             else:
                 print(f"  Warning: Could not get embed URL for report {report['id']}")
     
-    # Generate HTML
-    print("\nGenerating HTML...")
-    html = generate_html(reports_with_urls)
-    
-    # Write output
-    output_path = os.path.join(os.path.dirname(__file__), "index.html")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html)
+    # Generate HTML and assets
+    print("\nGenerating site assets...")
+    output_dir = os.path.dirname(os.path.abspath(__file__))
+    report_count = write_site(reports_with_urls, output_dir)
     
-    print(f"✓ Generated {output_path}")
-    print(f"✓ Included {len(reports_with_urls)} reports")
+    print(f"✓ Generated {os.path.join(output_dir, 'index.html')}")
+    print(f"✓ Included {report_count} reports")
+    print(get_http_cache().summary())
     print("\n" + "=" * 60)
     print("Build completed successfully!")
     print("=" * 60)
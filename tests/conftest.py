@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The scripts under src/ import their siblings directly, as when run from their own directory
+sys.path.insert(0, os.path.join(ROOT, "src", "report"))
+sys.path.insert(0, os.path.join(ROOT, "src", "site"))
@@ -0,0 +1,77 @@
+import json
+import os
+
+from assets import AssetPipeline, extract_stylesheet, minify_html
+
+import build_site
+
+
+def test_minify_html_keeps_raw_blocks_verbatim():
+    notice = "<!--\n  AUTO-GENERATED FILE - DO NOT EDIT MANUALLY\n  Build time: now\n-->"
+    script = "<script>\n  var a  =  1;\n  // keep\n</script>"
+    pre = "<pre>  two  spaces\n\nand lines</pre>"
+    html = f"<!DOCTYPE html>\n{notice}\n<p>\n  Hello   <!-- dropped -->  world\n</p>\n{script}\n{pre}\n"
+
+    minified = minify_html(html)
+
+    assert notice in minified
+    assert script in minified
+    assert pre in minified
+    assert "dropped" not in minified
+    assert "<p> Hello world </p>" in minified
+
+
+def test_extract_stylesheet_leaves_placeholder():
+    html, css = extract_stylesheet("<head><style>\n a { color: red; }\n</style></head>")
+    assert html == "<head>{{STYLESHEET}}</head>"
+    assert css == "\n a { color: red; }\n"
+
+
+def _build(output_dir, content):
+    pipeline = AssetPipeline(str(output_dir))
+    path = pipeline.add_hashed("reports.json", content, content)
+    pipeline.finalize()
+    return path
+
+
+def test_finalize_keeps_previous_generation_only(tmp_path):
+    first = _build(tmp_path, "[1]")
+    second = _build(tmp_path, "[2]")
+    assert os.path.exists(tmp_path / first)
+
+    third = _build(tmp_path, "[3]")
+
+    assets = sorted(os.listdir(tmp_path / "assets"))
+    assert assets == sorted(os.path.basename(p) for p in (second, third))
+    assert json.load(open(tmp_path / "manifest.json")) == {"reports.json": third}
+
+
+def test_no_sidecars_unless_precompressing(tmp_path):
+    pipeline = AssetPipeline(str(tmp_path))
+    pipeline.add_entry("index.html", "<p>x</p>" * 200, "<p>x</p>" * 200)
+    pipeline.finalize()
+    assert sorted(os.listdir(tmp_path)) == ["_headers", "assets", "index.html", "manifest.json"]
+    assert pipeline.report[0][1]["gzip"] < 1600
+
+    pipeline = AssetPipeline(str(tmp_path), precompress=True)
+    pipeline.add_entry("index.html", "<p>x</p>" * 200, "<p>x</p>" * 200)
+    pipeline.finalize()
+    assert os.path.exists(tmp_path / "index.html.gz")
+
+
+def test_write_site_points_data_src_at_hashed_reports(tmp_path):
+    reports = [
+        {"id": "a", "time": "2026-05-05T08:00:00Z", "title": "", "embed_url": "https://example.com/a"},
+    ]
+
+    build_site.write_site(reports, str(tmp_path))
+
+    manifest = json.load(open(tmp_path / "manifest.json"))
+    reports_url = manifest["reports.json"]
+    assert reports_url.startswith("assets/reports.") and reports_url.endswith(".json")
+    html = (tmp_path / "index.html").read_text(encoding="utf-8")
+    assert f'data-src="{reports_url}"' in html
+    assert f'href="{manifest["styles.css"]}"' in html
+    assert json.load(open(tmp_path / reports_url, encoding="utf-8")) == [
+        {"date": "Lunedì 4 maggio 2026", "url": "https://example.com/a"}
+    ]
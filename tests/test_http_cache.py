@@ -0,0 +1,88 @@
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_cache import HTTPCache
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    """Static files with Last-Modified/304 support; /fresh/* is also cacheable for a minute."""
+
+    def end_headers(self):
+        if self.path.startswith("/fresh/"):
+            self.send_header("Cache-Control", "max-age=60")
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / "www"
+    (root / "fresh").mkdir(parents=True)
+    for name in ["a.json", "b.json", "c.json", "fresh/d.json"]:
+        (root / name).write_text('[{"value": "%s"}]' % name)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_Handler, directory=str(root)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HTTPCache(cache_dir=str(tmp_path / "cache"))
+
+
+def test_miss_then_revalidate(server, cache):
+    first = cache.get(requests, f"{server}/a.json", params={"p": 1}, timeout=5)
+    second = cache.get(requests, f"{server}/a.json", params={"p": 1}, timeout=5)
+    assert (cache.misses, cache.revalidated, cache.hits) == (1, 1, 0)
+    assert second.status_code == 200
+    assert second.json() == first.json() == [{"value": "a.json"}]
+
+
+def test_fresh_response_is_a_hit(server, cache):
+    cache.get(requests, f"{server}/fresh/d.json", timeout=5)
+    assert cache.get(requests, f"{server}/fresh/d.json", timeout=5).json() == [{"value": "fresh/d.json"}]
+    assert (cache.misses, cache.revalidated, cache.hits) == (1, 0, 1)
+
+
+def test_index_survives_restart(server, cache):
+    cache.get(requests, f"{server}/a.json", timeout=5)
+    reopened = HTTPCache(cache_dir=cache.cache_dir)
+    reopened.get(requests, f"{server}/a.json", timeout=5)
+    assert reopened.revalidated == 1
+
+
+def test_least_recently_used_entry_is_evicted(server, cache):
+    cache.get(requests, f"{server}/a.json", timeout=5)
+    cache.max_bytes = sum(entry["size"] for entry in cache.index.values()) * 2
+    cache.get(requests, f"{server}/b.json", timeout=5)
+    cache.get(requests, f"{server}/a.json", timeout=5)  # a is now more recent than b
+    cache.get(requests, f"{server}/c.json", timeout=5)
+    urls = sorted(entry["url"].rsplit("/", 1)[-1] for entry in cache.index.values())
+    assert urls == ["a.json", "c.json"]
+    assert len([f for f in os.listdir(cache.cache_dir) if f.endswith(".gz")]) == 2
+
+
+def test_damaged_body_is_a_miss(server, cache):
+    cache.get(requests, f"{server}/a.json", timeout=5)
+    (key,) = cache.index
+    with open(cache._body_path(key), "r+b") as f:
+        f.truncate(10)
+    assert cache.get(requests, f"{server}/a.json", timeout=5).json() == [{"value": "a.json"}]
+    assert (cache.misses, cache.revalidated) == (2, 0)
+
+
+def test_credentials_are_part_of_the_key(server, cache):
+    cache.get(requests, f"{server}/a.json", headers={"X-API-Key": "one"}, timeout=5)
+    cache.get(requests, f"{server}/a.json", headers={"X-API-Key": "two"}, timeout=5)
+    assert (cache.misses, cache.revalidated) == (2, 0)
+    assert len(cache.index) == 2
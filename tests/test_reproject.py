@@ -0,0 +1,77 @@
+import copy
+import gzip
+import os
+from datetime import date, timedelta
+
+import pytest
+
+import query
+import reproject
+import sketches
+
+DAY = (date.today() - timedelta(days=1)).isoformat()
+
+RECORDS = [
+    {"id": str(47300000 + i), "psp_desc": psp, "ente_desc": ente, "pag_importo": amount,
+     "tipo_dovuto": tipo, "ora": str(i % 24), "giorno_della_settimana": "Lunedì",
+     "pag_data": f"{DAY}T00:00:00.000"}
+    for i, (psp, ente, amount, tipo) in enumerate([
+        ("Nexi", "Comune di Brescia", "25.00", "PRENOTA_SALUTE"),
+        ("Postepay", "Regione Lombardia", "156.89", "Tassa Auto"),
+        ("Nexi", "Comune di Como", "44.40", "os_verbali_pp"),
+        ("Intesa Sanpaolo S.p.A", "Regione Lombardia", "33.60", "TICKET_SANITARIO"),
+        ("Postepay", "Comune di Brescia", "29.40", "ts_sanamm"),
+    ])
+]
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    for module in (query, sketches, reproject):
+        monkeypatch.setattr(module, "get_project_root", lambda: str(tmp_path))
+    monkeypatch.delenv("OUTPUT_FILE", raising=False)
+    monkeypatch.setattr(query, "fetch_all_records", lambda date_ts: copy.deepcopy(RECORDS))
+    return tmp_path
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_reproject_matches_fetch_data(root):
+    csv_file = root / query.fetch_data(DAY)
+    sketch_file = root / sketches.sketch_path(DAY)
+    expected_csv, expected_sketch = _read(csv_file), _read(sketch_file)
+    os.remove(csv_file)
+    os.remove(sketch_file)
+
+    assert reproject.reproject_file(DAY, chunk_size=2) == len(RECORDS)
+
+    assert _read(csv_file) == expected_csv
+    assert _read(sketch_file) == expected_sketch
+
+
+def test_malformed_line_leaves_no_tmp_file(root):
+    raw_file = root / query.raw_file_relative(DAY)
+    os.makedirs(raw_file.parent)
+    with gzip.open(raw_file, "wt", encoding="utf-8") as f:
+        f.write('{"ora": "1"}\nnot json\n')
+    os.makedirs(root / "datasets", exist_ok=True)
+
+    with pytest.raises(ValueError):
+        reproject.reproject_file(DAY, chunk_size=1)
+
+    assert sorted(os.listdir(root / "datasets")) == ["raw"]
+
+
+def test_old_raw_copies_are_pruned(root):
+    old = (date.today() - timedelta(days=query.RAW_RETENTION_DAYS + 1)).isoformat()
+    for day in (old, DAY):
+        path = root / query.raw_file_relative(day)
+        os.makedirs(path.parent, exist_ok=True)
+        path.write_bytes(b"")
+
+    query.prune_raw_copies()
+
+    assert query.list_raw_dates() == [DAY]
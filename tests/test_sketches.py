@@ -0,0 +1,96 @@
+import bisect
+import csv
+import glob
+import json
+import os
+from collections import Counter, defaultdict
+
+import pytest
+
+from sketches import PaymentSketch
+
+from conftest import ROOT
+
+DATASETS = sorted(glob.glob(os.path.join(ROOT, "datasets", "pagamenti_*.csv")))
+
+
+def read_records(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def build_sketch(path):
+    date_short = os.path.basename(path)[len("pagamenti_"):-len(".csv")]
+    sketch = PaymentSketch(seed=date_short)
+    for record in read_records(path):
+        sketch.update(record)
+    return sketch
+
+
+@pytest.fixture(scope="module")
+def merged():
+    """Daily sketches serialized, reloaded and merged, plus exact statistics of the same rows."""
+    sketch = PaymentSketch()
+    amounts = defaultdict(list)
+    entes = Counter()
+    distinct = defaultdict(set)
+    for path in DATASETS:
+        daily = json.loads(json.dumps(build_sketch(path).to_dict()))
+        sketch.merge(PaymentSketch.from_dict(daily))
+        for record in read_records(path):
+            amounts[record["tipo_dovuto"]].append(float(record["pag_importo"]))
+            entes[record["ente_desc"]] += 1
+            distinct[record["ente_desc"]].add(record["id"])
+    return sketch, amounts, entes, distinct
+
+
+def test_round_trip_is_lossless():
+    sketch = build_sketch(DATASETS[0])
+    data = json.loads(json.dumps(sketch.to_dict()))
+    assert PaymentSketch.from_dict(data).to_dict() == data
+
+
+def test_same_input_gives_same_file():
+    assert build_sketch(DATASETS[-1]).to_dict() == build_sketch(DATASETS[-1]).to_dict()
+
+
+def test_merged_quantiles_within_rank_error(merged):
+    sketch, amounts, _, _ = merged
+    for group, values in sorted(amounts.items(), key=lambda kv: -len(kv[1]))[:5]:
+        values.sort()
+        for q, estimate in zip([0.1, 0.5, 0.9], sketch.amount_by_group[group].quantiles([0.1, 0.5, 0.9])):
+            low = bisect.bisect_left(values, estimate) / len(values)
+            high = bisect.bisect_right(values, estimate) / len(values)
+            assert low - 0.02 <= q <= high + 0.02, (group, q, estimate)
+
+
+def test_merged_heavy_hitters_bound_exact_counts(merged):
+    sketch, _, entes, _ = merged
+    top = sketch.top_ente.top(5)
+    assert [key for key, _, _ in top] == [key for key, _ in entes.most_common(5)]
+    for key, count, error in top:
+        assert count - error <= entes[key] <= count
+
+
+def test_merged_distinct_counts_close_to_exact(merged):
+    sketch, _, _, distinct = merged
+    for ente, ids in sorted(distinct.items(), key=lambda kv: -len(kv[1]))[:5]:
+        assert sketch.distinct_by_ente[ente].count() == pytest.approx(len(ids), rel=0.05)
+
+
+def test_backfill_only_reads_dated_exports(tmp_path, monkeypatch):
+    import sketches
+
+    datasets = tmp_path / "datasets"
+    datasets.mkdir()
+    with open(DATASETS[0], encoding="utf-8") as src:
+        header = src.readline() + src.readline()
+    (datasets / "pagamenti_2026-05-03.csv").write_text(header)
+    (datasets / "pagamenti_backup.csv").write_text(header)
+    (datasets / "notes_2026-05-03.csv").write_text(header)
+    monkeypatch.setattr(sketches, "get_project_root", lambda: str(tmp_path))
+    monkeypatch.delenv("OUTPUT_FILE", raising=False)
+
+    sketches.backfill_from_datasets()
+
+    assert os.listdir(tmp_path / "sketches") == ["pagamenti_2026-05-03.json"]